@@ -1,7 +1,11 @@
+import itertools
 import threading
 import time
-from collections import defaultdict
-from typing import Dict, Set, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+# per-thread cache of (ident, name) so MonitoredLock.acquire registers once
+_tls = threading.local()
+
 
 class RuntimeMonitoringEngine:
     """
@@ -10,112 +14,171 @@ class RuntimeMonitoringEngine:
     - Thread creation/termination
     - Lock acquisition/release sequences
     - Deadlocks in real-time
+
+    There is no engine-wide lock. All shared state lives in plain dicts that
+    are only touched one key at a time (or copied whole with dict()), and each
+    of those operations is atomic under the GIL. A thread's wait edge is only
+    written by that thread, and a lock's owner only by the thread acquiring or
+    releasing it. The one lock, _detect_lock, serializes deadlock checks so
+    that a cycle is reported to exactly one of the threads forming it.
     """
     
     _instance = None
     _lock = threading.Lock()
     
     def __new__(cls):
+        # double-checked: once the instance exists, skip the class lock
+        inst = cls._instance
+        if inst is not None:
+            return inst
         with cls._lock:
             if cls._instance is None:
-                cls._instance = super().__new__(cls)
-                cls._instance._initialized = False
+                inst = super().__new__(cls)
+                inst._init_state()
+                # publish only once fully built, the fast path above reads it unlocked
+                cls._instance = inst
         return cls._instance
     
     def __init__(self):
-        if not self._initialized:
-            self.thread_registry: Dict[int, str] = {}
-            self.lock_registry: Dict[int, str] = {}
-            self.lock_graph: Dict[int, Set[int]] = defaultdict(set)
-            self.lock_owners: Dict[int, int] = {}
-            self.engine_lock = threading.Lock()
-            self._initialized = True
+        # All state is set up exactly once in __new__; __init__ still runs on
+        # every RuntimeMonitoringEngine() call, so it has nothing left to do.
+        pass
+
+    def _init_state(self) -> None:
+        """Create the engine's state; called once, under the class lock"""
+        self.thread_registry: Dict[int, str] = {}
+        self.lock_registry: Dict[int, str] = {}
+        self._detect_lock = threading.Lock()
+        # thread_id -> the lock it is blocked on; a thread waits on at most
+        # one lock at a time
+        self.waiting_on: Dict[int, int] = {}
+        # lock_id -> one-element [owner_thread] cell
+        self.lock_owners: Dict[int, List[Optional[int]]] = {}
+        # Bumped after every mutation with a fresh value from the counter, so
+        # a cached snapshot can never be mistaken for a newer state even if
+        # two bumps race; get_wait_graph reuses its result until it changes.
+        self._version_gen = itertools.count(1)
+        self._graph_version = 0
+        self._cached_graph: Tuple[int, Dict[str, List[str]]] = (-1, {})
+
+    def _owner_of(self, lock_id: int) -> Optional[int]:
+        cell = self.lock_owners.get(lock_id)
+        return cell[0] if cell is not None else None
+
+    def _thread_name(self, thread_id: int) -> str:
+        # no eager .get() default: that would format a fallback on every lookup
+        name = self.thread_registry.get(thread_id)
+        return name if name is not None else f"Thread-{thread_id}"
+
+    def _lock_name(self, lock_id: int) -> str:
+        name = self.lock_registry.get(lock_id)
+        return name if name is not None else f"Lock-{lock_id}"
 
     def register_thread(self, thread_id: int, thread_name: str) -> None:
         """Register a thread with the monitoring system"""
-        with self.engine_lock:
-            self.thread_registry[thread_id] = thread_name
+        # nothing to do (not even a version bump) if this name is already recorded
+        if self.thread_registry.get(thread_id) == thread_name:
+            return
+        self.thread_registry[thread_id] = thread_name
+        self._graph_version = next(self._version_gen)
 
     def register_lock(self, lock_id: int, lock_identity: str) -> None:
         """Register a lock with the monitoring system"""
-        with self.engine_lock:
-            self.lock_registry[lock_id] = lock_identity
+        self.lock_registry[lock_id] = lock_identity
+        self._graph_version = next(self._version_gen)
 
     def pre_acquire(self, thread_id: int, lock_id: int) -> Optional[List[str]]:
         """
         Called before a thread attempts to acquire a lock.
         Returns deadlock information if detected.
         """
-        with self.engine_lock:
-            if lock_id in self.lock_owners and self.lock_owners[lock_id] != thread_id:
-                self.lock_graph[thread_id].add(lock_id)
-                deadlock = self._check_deadlock(thread_id)
-                if deadlock:
-                    return deadlock
+        # Fast path, no locks taken: an unowned lock can't close a cycle. The read
+        # is racy, but an owner appearing right after it only means this call
+        # misses an edge that the next contender will see.
+        cell = self.lock_owners.get(lock_id)
+        owner = cell[0] if cell is not None else None
+        if owner is None or owner == thread_id:
             return None
 
+        self.waiting_on[thread_id] = lock_id
+        self._graph_version = next(self._version_gen)
+
+        # A cycle through the new edge has to continue from the owner, so if
+        # the owner isn't waiting on anything there is nothing to search.
+        # Our edge is published before this read, so of two threads racing
+        # into a cycle at least one sees the other's edge.
+        if owner not in self.waiting_on:
+            return None
+
+        with self._detect_lock:
+            return self._check_deadlock(thread_id)
+
     def post_acquire(self, thread_id: int, lock_id: int) -> None:
         """Called after a thread successfully acquires a lock"""
-        with self.engine_lock:
-            self.lock_owners[lock_id] = thread_id
-            if lock_id in self.lock_graph[thread_id]:
-                self.lock_graph[thread_id].remove(lock_id)
+        # plain get first: setdefault would build a throwaway [None] every call
+        cell = self.lock_owners.get(lock_id)
+        if cell is None:
+            cell = self.lock_owners.setdefault(lock_id, [None])
+        cell[0] = thread_id
+        self.waiting_on.pop(thread_id, None)
+        self._graph_version = next(self._version_gen)
 
     def release(self, thread_id: int, lock_id: int) -> None:
         """Called when a thread releases a lock"""
-        with self.engine_lock:
-            if lock_id in self.lock_owners and self.lock_owners[lock_id] == thread_id:
-                del self.lock_owners[lock_id]
+        cell = self.lock_owners.get(lock_id)
+        if cell is not None and cell[0] == thread_id:
+            cell[0] = None
+            self._graph_version = next(self._version_gen)
 
     def _check_deadlock(self, starting_thread: int) -> Optional[List[str]]:
-        """Detect deadlocks using cycle detection in the wait-for graph"""
-        visited = set()
-        stack = []
-        cycle = []
-        
-        def dfs(thread_id):
-            nonlocal cycle
-            if thread_id in stack:
-                cycle = stack[stack.index(thread_id):] + [thread_id]
-                return True
-            if thread_id in visited:
-                return False
-                
-            visited.add(thread_id)
-            stack.append(thread_id)
-            
-            for lock_id in self.lock_graph.get(thread_id, set()):
-                if lock_id in self.lock_owners:
-                    owner_thread = self.lock_owners[lock_id]
-                    if dfs(owner_thread):
-                        return True
-                        
-            stack.pop()
-            return False
-            
-        if dfs(starting_thread):
-            return self._format_cycle(cycle)
-        return None
+        """
+        Detect deadlocks using cycle detection in the wait-for graph.
+        Runs under _detect_lock. A thread seen waiting on the chain cannot
+        release the locks it holds until it stops waiting.
+        """
+        # Every thread has at most one outgoing edge, and any new cycle must use
+        # the edge just added for starting_thread. So walk forward from there
+        # and only report a cycle if the chain leads back to starting_thread;
+        # a cycle further down the chain that doesn't include us is not ours.
+        # No visited set is needed: a chain of distinct threads can't be longer
+        # than the number of waiting threads, so a walk that gets past that
+        # without returning has looped into some other cycle.
+        waiting_on = self.waiting_on
+        path: List[Tuple[int, int]] = []
+        thread_id = starting_thread
+        while True:
+            lock_id = waiting_on.get(thread_id)
+            if lock_id is None:
+                return None
+            owner_thread = self._owner_of(lock_id)
+            if owner_thread is None:
+                return None
+            path.append((thread_id, lock_id))
+            if owner_thread == starting_thread:
+                # starting_thread gives up rather than wait, so drop its edge
+                # while still under _detect_lock; a thread racing into the same
+                # cycle then finds the chain broken and exactly one caller is
+                # told about the deadlock
+                del waiting_on[starting_thread]
+                self._graph_version = next(self._version_gen)
+                return self._format_cycle(path)
+            if len(path) > len(waiting_on):
+                return None
+            thread_id = owner_thread
 
-    def _format_cycle(self, cycle: List[int]) -> List[str]:
-        """Format deadlock cycle into human-readable strings"""
+    def _format_cycle(self, cycle: List[Tuple[int, int]]) -> List[str]:
+        """
+        Format deadlock cycle into human-readable strings.
+        `cycle` holds (thread, awaited lock) edges as found by the search; the
+        lock of each edge is held by the thread of the next one.
+        """
         result = []
-        for i in range(len(cycle) - 1):
-            thread_id = cycle[i]
-            next_thread_id = cycle[i+1]
-            
-            connecting_lock = None
-            for lock_id in self.lock_graph.get(thread_id, set()):
-                if lock_id in self.lock_owners and self.lock_owners[lock_id] == next_thread_id:
-                    connecting_lock = lock_id
-                    break
-            
-            if connecting_lock:
-                thread_name = self.thread_registry.get(thread_id, f"Thread-{thread_id}")
-                lock_name = self.lock_registry.get(connecting_lock, f"Lock-{connecting_lock}")
-                next_thread_name = self.thread_registry.get(next_thread_id, f"Thread-{next_thread_id}")
-                result.append(f"{thread_name} → waiting for {lock_name} (held by {next_thread_name})")
-        
+        for i, (thread_id, lock_id) in enumerate(cycle):
+            next_thread_id = cycle[(i + 1) % len(cycle)][0]
+            thread_name = self._thread_name(thread_id)
+            lock_name = self._lock_name(lock_id)
+            next_thread_name = self._thread_name(next_thread_id)
+            result.append(f"{thread_name} → waiting for {lock_name} (held by {next_thread_name})")
         return result
 
     def get_wait_graph(self) -> Dict[str, List[str]]:
@@ -127,21 +190,21 @@ class RuntimeMonitoringEngine:
             "Thread-2": ["waiting for LockA (held by Thread-1)"]
         }
         """
-        with self.engine_lock:
-            graph = {}
-            for thread_id, locks in self.lock_graph.items():
-                if locks:
-                    thread_name = self.thread_registry.get(thread_id, f"Thread-{thread_id}")
-                    deps = []
-                    for lock_id in locks:
-                        if lock_id in self.lock_owners:
-                            owner_thread = self.lock_owners[lock_id]
-                            owner_name = self.thread_registry.get(owner_thread, f"Thread-{owner_thread}")
-                            lock_name = self.lock_registry.get(lock_id, f"Lock-{lock_id}")
-                            deps.append(f"waiting for {lock_name} (held by {owner_name})")
-                    if deps:
-                        graph[thread_name] = deps
-            return graph
+        version = self._graph_version
+        cached_version, cached_graph = self._cached_graph
+        if cached_version == version:
+            return {thread: list(deps) for thread, deps in cached_graph.items()}
+
+        graph = {}
+        for thread_id, lock_id in dict(self.waiting_on).items():
+            owner_thread = self._owner_of(lock_id)
+            if owner_thread is not None:
+                thread_name = self._thread_name(thread_id)
+                owner_name = self._thread_name(owner_thread)
+                lock_name = self._lock_name(lock_id)
+                graph[thread_name] = [f"waiting for {lock_name} (held by {owner_name})"]
+        self._cached_graph = (version, graph)
+        return {thread: list(deps) for thread, deps in graph.items()}
 
     def visualize_dependencies(self) -> str:
         """Generate a text visualization of the current wait-for graph"""
@@ -152,8 +215,7 @@ class RuntimeMonitoringEngine:
         output = ["Current Wait-For Graph:"]
         for thread, deps in graph.items():
             output.append(f"{thread}:")
-            for dep in deps:
-                output.append(f"  ├─ {dep}")
+            output.extend(f"  ├─ {dep}" for dep in deps)
         return "\n".join(output)
 
 
@@ -166,23 +228,30 @@ class MonitoredLock:
         # critical section
     """
     
-    _lock_counter = 0
-    _counter_lock = threading.Lock()
+    # count.__next__ runs in C and is atomic under the GIL, so ids stay unique
+    # across threads without a Python-level lock
+    _next_id = itertools.count(1).__next__
     
     def __init__(self, name: str):
         self.lock = threading.Lock()
         self.name = name
         self.monitor = RuntimeMonitoringEngine()
-        with MonitoredLock._counter_lock:
-            MonitoredLock._lock_counter += 1
-            self.lock_id = MonitoredLock._lock_counter
+        self.lock_id = MonitoredLock._next_id()
         self.monitor.register_lock(self.lock_id, self.name)
 
     def acquire(self, blocking=True, timeout=None) -> bool:
         """Acquire the lock with deadlock detection"""
-        thread_id = threading.get_ident()
-        thread_name = threading.current_thread().name
-        self.monitor.register_thread(thread_id, thread_name)
+        thread_id = getattr(_tls, 'thread_id', None)
+        if thread_id is None:
+            thread_id = _tls.thread_id = threading.get_ident()
+            _tls.thread_name = threading.current_thread().name
+            self.monitor.register_thread(thread_id, _tls.thread_name)
+
+        # Uncontended fast path: a free lock can't be part of a deadlock, so
+        # take it and record the owner without consulting the wait graph
+        if self.lock.acquire(blocking=False):
+            self.monitor.post_acquire(thread_id, self.lock_id)
+            return True
         
         deadlock = self.monitor.pre_acquire(thread_id, self.lock_id)
         if deadlock:
@@ -3,44 +3,68 @@ import os
 import sys
 from collections import defaultdict
 
-class SyncIssueDetector(ast.NodeVisitor):
+class SyncIssueDetector:
     def __init__(self):
         self.shared_resources = defaultdict(list)  # {variable_name: [access_locations]}
         self.locks = set()
+        self.lock_order = []  # locks in the order they were first acquired
+        self.last_acquire = {}  # {lock_name: len(lock_order) at its latest acquire}
         self.lock_acquires = defaultdict(list)  # {lock_name: [locations]}
         self.lock_releases = defaultdict(list)  # {lock_name: [locations]}
         self.deadlock_pairs = set()
         self.locked_vars = set()
         self.current_locks = set()
     
-    def visit_Assign(self, node):
-        if isinstance(node.targets[0], ast.Name):
-            var_name = node.targets[0].id
-            if not self.current_locks:  # If no lock is held
-                self.shared_resources[var_name].append((node.lineno, node.col_offset))
-        self.generic_visit(node)
+    def scan(self, tree):
+        # Explicit pre-order walk: visits nodes in the same source order as
+        # NodeVisitor (the held-lock state depends on it) without the per-node
+        # visit_<Class> lookup. ast.walk is breadth-first, so it can't be used.
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            stack.extend(reversed(list(ast.iter_child_nodes(node))))
+            node_type = type(node)
+
+            if node_type is ast.Assign:
+                target = node.targets[0]
+                if type(target) is ast.Name and not self.current_locks:  # If no lock is held
+                    self.shared_resources[target.id].append((node.lineno, node.col_offset))
+                continue
+
+            if node_type is not ast.Call:
+                continue
+            func = node.func
+            if type(func) is not ast.Attribute or type(func.value) is not ast.Name:
+                continue
+            func_name = func.attr
+            obj_name = func.value.id
 
-    def visit_Call(self, node):
-        if isinstance(node.func, ast.Attribute) and isinstance(node.func.value, ast.Name):
-            func_name = node.func.attr
-            obj_name = node.func.value.id
-            
             if func_name == 'acquire':
-                self.locks.add(obj_name)
+                if obj_name not in self.locks:
+                    self.locks.add(obj_name)
+                    self.lock_order.append(obj_name)
                 self.lock_acquires[obj_name].append((node.lineno, node.col_offset))
                 self.current_locks.add(obj_name)
                 self.detect_deadlock(obj_name)
             elif func_name == 'release':
                 self.lock_releases[obj_name].append((node.lineno, node.col_offset))
                 self.current_locks.discard(obj_name)
-        self.generic_visit(node)
     
     def detect_deadlock(self, lock_name):
-        for acquired_lock in self.locks:
-            if acquired_lock != lock_name:
-                self.deadlock_pairs.add((acquired_lock, lock_name))
+        # Every lock seen so far pairs with lock_name; that set is a prefix of
+        # lock_order, so only remember its length and expand pairs once.
+        self.last_acquire[lock_name] = len(self.lock_order)
+
+    def collect_deadlock_pairs(self):
+        self.deadlock_pairs = {
+            (acquired_lock, lock_name)
+            for lock_name, seen in self.last_acquire.items()
+            for acquired_lock in self.lock_order[:seen]
+            if acquired_lock != lock_name
+        }
     
     def report_issues(self):
+        self.collect_deadlock_pairs()
         print("Potential Synchronization Issues Detected:")
         
         for var, accesses in self.shared_resources.items():
@@ -58,10 +82,11 @@ class SyncIssueDetector(ast.NodeVisitor):
 
 
 def analyze_code(file_path):
-    with open(file_path, "r") as source_file:
-        tree = ast.parse(source_file.read())
+    # read bytes so the parser honours a PEP 263 encoding cookie
+    with open(file_path, "rb") as source_file:
+        tree = ast.parse(source_file.read(), filename=file_path)
     detector = SyncIssueDetector()
-    detector.visit(tree)
+    detector.scan(tree)
     detector.report_issues()
 
 if __name__ == "__main__":
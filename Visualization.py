@@ -1,8 +1,16 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request
+import json
 import threading
 import time
 from collections import defaultdict
 
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
 app = Flask(__name__)
 
 thread_data = {
@@ -11,6 +19,15 @@ thread_data = {
     'deadlocks': []
 }
 
+# thread_data encoded once per change instead of once per /data poll
+_cached_bytes = _dumps(thread_data)
+
+
+def _refresh_cached_bytes():
+    """Re-encode thread_data; call while holding the lock that guards it."""
+    global _cached_bytes
+    _cached_bytes = _dumps(thread_data)
+
 class DeadlockSimulator:
     def __init__(self):
         self.lock = threading.Lock()
@@ -26,6 +43,7 @@ class DeadlockSimulator:
             thread_data['links'] = []
             thread_data['timeline'] = []
             thread_data['deadlocks'] = []
+            _refresh_cached_bytes()
 
         def worker(thread_id):
             # Each thread tries to acquire two different resources
@@ -44,6 +62,7 @@ class DeadlockSimulator:
                     'event': f'T{thread_id} acquired R{first_res+1}',
                     'time': time.time()
                 })
+                _refresh_cached_bytes()
             
             resources[first_res].acquire()
             time.sleep(0.5)
@@ -70,6 +89,7 @@ resources = sorted([resource_a, resource_b], key=id)
 for res in resources:
     res.acquire()'''
                     })
+                _refresh_cached_bytes()
             
             resources[second_res].acquire()  # This will block
             resources[second_res].release()
@@ -89,7 +109,7 @@ def index():
 
 @app.route('/data')
 def get_data():
-    return jsonify(thread_data)
+    return Response(_cached_bytes, mimetype='application/json')
 
 if __name__ == '__main__':
     app.run(port=5000, debug=True)